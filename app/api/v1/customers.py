@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi import APIRouter, Body, HTTPException, Request, Response, status, Query, Depends
+from fastapi.responses import ORJSONResponse
+from datetime import datetime
 from typing import List
+import aiomysql
+import orjson
 import pymysql
 from app.schemas.customer import (
     CustomerCreate,
@@ -7,6 +11,7 @@ from app.schemas.customer import (
     CustomerResponse,
 )
 from app.db.database import get_db_connection
+from app.core.cache import TTLCache, make_etag
 from app.core.security import User, get_current_user
 
 router = APIRouter(
@@ -14,6 +19,57 @@ router = APIRouter(
     tags=["Clientes"]
 )
 
+# Columnas que expone la API, enumeradas explícitamente: así no viajan
+# columnas de más por la red y el orden posicional de las filas queda
+# garantizado aunque el esquema crezca.
+CUSTOMER_COLS = (
+    "customer_id, store_id, first_name, last_name, email, "
+    "address_id, active, create_date, last_update"
+)
+
+# Consultas repetidas en varios endpoints: se definen una sola vez a nivel
+# de módulo para no reconstruir el texto SQL en cada petición.
+SELECT_CUSTOMER_SQL = (
+    f"SELECT {CUSTOMER_COLS} FROM customer WHERE customer_id = %s"
+)
+
+# UPDATE de texto constante: COALESCE(%s, columna) mantiene el valor
+# actual cuando el campo llega a NULL, así el SQL no varía según qué
+# campos se envíen y no hay que montar la consulta en cada petición.
+UPDATE_CUSTOMER_SQL = (
+    "UPDATE customer SET "
+    "store_id = COALESCE(%s, store_id), "
+    "first_name = COALESCE(%s, first_name), "
+    "last_name = COALESCE(%s, last_name), "
+    "email = COALESCE(%s, email), "
+    "address_id = COALESCE(%s, address_id), "
+    "active = COALESCE(%s, active), "
+    "last_update = NOW() "
+    "WHERE customer_id = %s"
+)
+
+# Caché de respuestas del listado: el listado es mayoritariamente de solo
+# lectura, así que servimos el JSON ya serializado durante unos segundos y
+# lo invalidamos en cuanto hay una mutación.
+_list_cache = TTLCache(maxsize=256, ttl=5)
+
+# Caché por id para ráfagas de lecturas repetidas (polling, reintentos):
+# TTL corto y se invalida la entrada concreta al modificar o borrar.
+_customer_cache = TTLCache(maxsize=10_000, ttl=2)
+
+def _customer_to_dict(row) -> dict:
+    return {
+        "customer_id": row[0],
+        "store_id": row[1],
+        "first_name": row[2],
+        "last_name": row[3],
+        "email": row[4],
+        "address_id": row[5],
+        "active": bool(row[6]),
+        "create_date": row[7],
+        "last_update": row[8],
+    }
+
 @router.post(
     "",
     status_code=status.HTTP_201_CREATED,
@@ -26,16 +82,21 @@ async def create_customer(
     customer: CustomerCreate,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
+            # RETURNING (MariaDB 10.5+) devuelve la fila insertada en el
+            # mismo round-trip, evitando el SELECT posterior.
             query = """
                 INSERT INTO customer
                 (store_id, first_name, last_name, email,
                  address_id, active, create_date)
                 VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                RETURNING customer_id, store_id, first_name, last_name,
+                          email, address_id, active, create_date,
+                          last_update
             """
-            cursor.execute(query, (
+            await cursor.execute(query, (
                 customer.store_id,
                 customer.first_name,
                 customer.last_name,
@@ -43,39 +104,83 @@ async def create_customer(
                 customer.address_id,
                 customer.active
             ))
-            conn.commit()
+            row = await cursor.fetchone()
+            _list_cache.clear()
 
-            customer_id = cursor.lastrowid
-            cursor.execute(
-                "SELECT * FROM customer WHERE customer_id = %s",
-                (customer_id,)
+            # Devolver la respuesta ya serializada evita que FastAPI
+            # revalide la fila contra el response_model; el modelo del
+            # decorador queda solo para la documentación.
+            return ORJSONResponse(
+                _customer_to_dict(row),
+                status_code=status.HTTP_201_CREATED
+            )
+        except pymysql.IntegrityError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Error de integridad: {str(e)}"
             )
-            row = cursor.fetchone()
+        finally:
+            await cursor.close()
 
-            if not row:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Error al recuperar cliente creado"
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    name="Crear clientes en lote",
+    summary="Crea varios clientes en una sola petición",
+    description="Registra una lista de clientes en la base de datos usando un único INSERT por lotes dentro de una sola transacción"
+)
+async def create_customers_bulk(
+    customers: List[CustomerCreate] = Body(
+        ..., min_length=1, max_length=1000
+    ),
+    current_user: User = Depends(get_current_user)
+):
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
+        try:
+            # Transacción explícita: si el lote supera el tamaño de
+            # paquete, executemany lo parte en varias sentencias y aun
+            # así debe ser todo-o-nada.
+            await conn.begin()
+            # create_date va como parámetro (una sola marca de tiempo
+            # para todo el lote): con un NOW() inline en el VALUES,
+            # executemany no puede reescribir el lote como un único
+            # INSERT multi-fila y cae a una sentencia por fila.
+            create_date = datetime.now()
+            rows = [
+                (
+                    c.store_id,
+                    c.first_name,
+                    c.last_name,
+                    c.email,
+                    c.address_id,
+                    c.active,
+                    create_date
                 )
-
-            return CustomerResponse(
-                customer_id=row[0],
-                store_id=row[1],
-                first_name=row[2],
-                last_name=row[3],
-                email=row[4],
-                address_id=row[5],
-                active=bool(row[6]),
-                create_date=row[7],
-                last_update=row[8]
+                for c in customers
+            ]
+            # executemany reescribe el VALUES en un único INSERT
+            # multi-fila: un solo round-trip y una sola transacción
+            # para todo el lote.
+            await cursor.executemany(
+                "INSERT INTO customer "
+                "(store_id, first_name, last_name, email, "
+                " address_id, active, create_date) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows
             )
+            await conn.commit()
+            _list_cache.clear()
+
+            return {"inserted": cursor.rowcount}
         except pymysql.IntegrityError as e:
+            await conn.rollback()
             raise HTTPException(
                 status_code=400,
                 detail=f"Error de integridad: {str(e)}"
             )
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.get(
     "",
@@ -87,42 +192,60 @@ async def create_customer(
 async def get_customers(
     skip: int = Query(0, ge=0),
     limit: int = Query(None, ge=1),
+    after_id: int = Query(None, ge=1),
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    cache_key = (skip, limit, after_id)
+    cached = _list_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    async with get_db_connection() as conn:
+        # SSCursor no bufferiza el resultado completo en el driver: las
+        # filas se recogen por lotes y se convierten sobre la marcha.
+        cursor = await conn.cursor(aiomysql.SSCursor)
         try:
-            if limit is None:
-                cursor.execute(
-                    "SELECT * FROM customer ORDER BY customer_id "
+            if after_id is not None:
+                # Paginación por keyset: seguir desde el último
+                # customer_id visto es un range scan sobre la clave
+                # primaria, mientras que OFFSET recorre y descarta
+                # `skip` filas.
+                await cursor.execute(
+                    f"SELECT {CUSTOMER_COLS} FROM customer "
+                    "WHERE customer_id > %s "
+                    "ORDER BY customer_id LIMIT %s",
+                    (after_id, limit or 100)
+                )
+            elif limit is None:
+                await cursor.execute(
+                    f"SELECT {CUSTOMER_COLS} FROM customer "
+                    "ORDER BY customer_id "
                     "LIMIT 18446744073709551615 OFFSET %s",
                     (skip,)
                 )
             else:
-                cursor.execute(
-                    "SELECT * FROM customer ORDER BY customer_id "
-                    "LIMIT %s OFFSET %s",
+                await cursor.execute(
+                    f"SELECT {CUSTOMER_COLS} FROM customer "
+                    "ORDER BY customer_id LIMIT %s OFFSET %s",
                     (limit, skip)
                 )
-            rows = cursor.fetchall()
-
+            # Diccionarios planos + orjson: se evita construir un modelo
+            # Pydantic por fila en la ruta caliente del listado.
             customers = []
-            for row in rows:
-                customers.append(CustomerResponse(
-                    customer_id=row[0],
-                    store_id=row[1],
-                    first_name=row[2],
-                    last_name=row[3],
-                    email=row[4],
-                    address_id=row[5],
-                    active=bool(row[6]),
-                    create_date=row[7],
-                    last_update=row[8]
-                ))
-
-            return customers
+            while True:
+                chunk = await cursor.fetchmany(500)
+                if not chunk:
+                    break
+                customers.extend(
+                    _customer_to_dict(row) for row in chunk
+                )
+            payload = orjson.dumps(customers)
+            _list_cache.set(cache_key, payload)
+            return Response(
+                content=payload, media_type="application/json"
+            )
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.get(
     "/{customer_id}",
@@ -133,36 +256,40 @@ async def get_customers(
 )
 async def get_customer(
     customer_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "SELECT * FROM customer WHERE customer_id = %s",
-                (customer_id,)
+    cached = _customer_cache.get(customer_id)
+    if cached is not None:
+        payload, etag = cached
+    else:
+        async with get_db_connection() as conn:
+            cursor = await conn.cursor()
+            try:
+                await cursor.execute(SELECT_CUSTOMER_SQL, (customer_id,))
+                row = await cursor.fetchone()
+            finally:
+                await cursor.close()
+
+        if not row:
+            raise HTTPException(
+                status_code=404,
+                detail="Cliente no encontrado"
             )
-            row = cursor.fetchone()
 
-            if not row:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Cliente no encontrado"
-                )
+        # El ETag deriva de last_update: si el cliente ya tiene esta
+        # versión, un 304 vacío le ahorra el cuerpo entero.
+        payload = orjson.dumps(_customer_to_dict(row))
+        etag = make_etag(customer_id, row[8])
+        _customer_cache.set(customer_id, (payload, etag))
 
-            return CustomerResponse(
-                customer_id=row[0],
-                store_id=row[1],
-                first_name=row[2],
-                last_name=row[3],
-                email=row[4],
-                address_id=row[5],
-                active=bool(row[6]),
-                create_date=row[7],
-                last_update=row[8]
-            )
-        finally:
-            cursor.close()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
 
 @router.put(
     "/{customer_id}",
@@ -176,76 +303,38 @@ async def update_customer(
     customer: CustomerUpdate,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
-            cursor.execute(
-                "SELECT customer_id FROM customer WHERE customer_id = %s",
-                (customer_id,)
+            values = (
+                customer.store_id,
+                customer.first_name,
+                customer.last_name,
+                customer.email,
+                customer.address_id,
+                customer.active,
             )
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=404,
-                    detail="Cliente no encontrado"
-                )
-
-            updates = []
-            values = []
-
-            if customer.store_id is not None:
-                updates.append("store_id = %s")
-                values.append(customer.store_id)
-            if customer.first_name is not None:
-                updates.append("first_name = %s")
-                values.append(customer.first_name)
-            if customer.last_name is not None:
-                updates.append("last_name = %s")
-                values.append(customer.last_name)
-            if customer.email is not None:
-                updates.append("email = %s")
-                values.append(customer.email)
-            if customer.address_id is not None:
-                updates.append("address_id = %s")
-                values.append(customer.address_id)
-            if customer.active is not None:
-                updates.append("active = %s")
-                values.append(customer.active)
-
-            if not updates:
+            if all(value is None for value in values):
                 raise HTTPException(
                     status_code=400,
                     detail="No hay cambios a aplicar"
                 )
 
-            updates.append("last_update = NOW()")
-            values.append(customer_id)
-
-            query = (
-                f"UPDATE customer SET {', '.join(updates)} "
-                f"WHERE customer_id = %s"
-            )
-            cursor.execute(query, tuple(values))
-            conn.commit()
+            await cursor.execute(UPDATE_CUSTOMER_SQL, values + (customer_id,))
+            if cursor.rowcount == 0:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Cliente no encontrado"
+                )
+            _list_cache.clear()
+            _customer_cache.delete(customer_id)
 
-            cursor.execute(
-                "SELECT * FROM customer WHERE customer_id = %s",
-                (customer_id,)
-            )
-            row = cursor.fetchone()
+            await cursor.execute(SELECT_CUSTOMER_SQL, (customer_id,))
+            row = await cursor.fetchone()
 
-            return CustomerResponse(
-                customer_id=row[0],
-                store_id=row[1],
-                first_name=row[2],
-                last_name=row[3],
-                email=row[4],
-                address_id=row[5],
-                active=bool(row[6]),
-                create_date=row[7],
-                last_update=row[8]
-            )
+            return ORJSONResponse(_customer_to_dict(row))
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.delete(
     "/{customer_id}",
@@ -257,24 +346,23 @@ async def delete_customer(
     customer_id: int,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
-            cursor.execute(
-                "SELECT customer_id FROM customer WHERE customer_id = %s",
+            # LIMIT 1 deja que el optimizador pare en cuanto encuentra
+            # la fila: customer_id es clave primaria, así que el resultado
+            # es idéntico.
+            await cursor.execute(
+                "DELETE FROM customer WHERE customer_id = %s LIMIT 1",
                 (customer_id,)
             )
-            if not cursor.fetchone():
+            if cursor.rowcount == 0:
                 raise HTTPException(
                     status_code=404,
                     detail="Cliente no encontrado"
                 )
-
-            cursor.execute(
-                "DELETE FROM customer WHERE customer_id = %s",
-                (customer_id,)
-            )
-            conn.commit()
+            _list_cache.clear()
+            _customer_cache.delete(customer_id)
 
             return None
         except pymysql.IntegrityError:
@@ -283,4 +371,4 @@ async def delete_customer(
                 detail="No se puede eliminar un cliente con reservas activas"
             )
         finally:
-            cursor.close()
\ No newline at end of file
+            await cursor.close()
\ No newline at end of file
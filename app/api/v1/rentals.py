@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
-from typing import List
+from contextlib import AsyncExitStack
+from datetime import datetime
+from fastapi import APIRouter, Body, HTTPException, Request, Response, status, Query, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional
+import aiomysql
+import orjson
 import pymysql
 from app.schemas.rental import RentalCreate, RentalResponse
 from app.db.database import get_db_connection
+from app.core.cache import TTLCache, make_etag
 from app.core.security import User, get_current_user
 
 router = APIRouter(
@@ -10,6 +16,40 @@ router = APIRouter(
     tags=["Reservas"]
 )
 
+# Columnas que expone la API, enumeradas explícitamente: así no viajan
+# columnas de más por la red y el orden posicional de las filas queda
+# garantizado aunque el esquema crezca.
+RENTAL_COLS = (
+    "rental_id, rental_date, inventory_id, customer_id, "
+    "return_date, staff_id, last_update"
+)
+
+# Consultas repetidas en varios endpoints: se definen una sola vez a nivel
+# de módulo para no reconstruir el texto SQL en cada petición.
+SELECT_RENTAL_SQL = (
+    f"SELECT {RENTAL_COLS} FROM rental WHERE rental_id = %s"
+)
+
+# Caché de respuestas del listado: el listado es mayoritariamente de solo
+# lectura, así que servimos el JSON ya serializado durante unos segundos y
+# lo invalidamos en cuanto hay una mutación.
+_list_cache = TTLCache(maxsize=256, ttl=5)
+
+# Caché por id para ráfagas de lecturas repetidas (polling, reintentos):
+# TTL corto y se invalida la entrada concreta al devolver la reserva.
+_rental_cache = TTLCache(maxsize=10_000, ttl=2)
+
+def _rental_to_dict(row) -> dict:
+    return {
+        "rental_id": row[0],
+        "rental_date": row[1],
+        "inventory_id": row[2],
+        "customer_id": row[3],
+        "return_date": row[4],
+        "staff_id": row[5],
+        "last_update": row[6],
+    }
+
 @router.post(
     "",
     status_code=status.HTTP_201_CREATED,
@@ -22,45 +62,92 @@ async def create_rental(
     rental: RentalCreate,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
+            # RETURNING (MariaDB 10.5+) devuelve la fila insertada en el
+            # mismo round-trip, evitando el SELECT posterior.
             query = """
                 INSERT INTO rental
                 (rental_date, inventory_id, customer_id, staff_id)
                 VALUES (%s, %s, %s, %s)
+                RETURNING rental_id, rental_date, inventory_id,
+                          customer_id, return_date, staff_id, last_update
             """
-            cursor.execute(query, (
+            await cursor.execute(query, (
                 rental.rental_date,
                 rental.inventory_id,
                 rental.customer_id,
                 rental.staff_id
             ))
-            conn.commit()
+            row = await cursor.fetchone()
+            _list_cache.clear()
 
-            rental_id = cursor.lastrowid
-            cursor.execute(
-                "SELECT * FROM rental WHERE rental_id = %s",
-                (rental_id,)
+            # Devolver la respuesta ya serializada evita que FastAPI
+            # revalide la fila contra el response_model; el modelo del
+            # decorador queda solo para la documentación.
+            return ORJSONResponse(
+                _rental_to_dict(row),
+                status_code=status.HTTP_201_CREATED
             )
-            row = cursor.fetchone()
-
-            return RentalResponse(
-                rental_id=row[0],
-                rental_date=row[1],
-                inventory_id=row[2],
-                customer_id=row[3],
-                return_date=row[4],
-                staff_id=row[5],
-                last_update=row[6]
+        except pymysql.IntegrityError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Integrity error: {str(e)}"
+            )
+        finally:
+            await cursor.close()
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    name="Crear reservas en lote",
+    summary="Crea varias reservas en una sola petición",
+    description="Registra una lista de reservas en la base de datos usando un único INSERT por lotes dentro de una sola transacción"
+)
+async def create_rentals_bulk(
+    rentals: List[RentalCreate] = Body(
+        ..., min_length=1, max_length=1000
+    ),
+    current_user: User = Depends(get_current_user)
+):
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
+        try:
+            # Transacción explícita: si el lote supera el tamaño de
+            # paquete, executemany lo parte en varias sentencias y aun
+            # así debe ser todo-o-nada.
+            await conn.begin()
+            rows = [
+                (
+                    r.rental_date,
+                    r.inventory_id,
+                    r.customer_id,
+                    r.staff_id
+                )
+                for r in rentals
+            ]
+            # executemany reescribe el VALUES en un único INSERT
+            # multi-fila: un solo round-trip y una sola transacción
+            # para todo el lote.
+            await cursor.executemany(
+                "INSERT INTO rental "
+                "(rental_date, inventory_id, customer_id, staff_id) "
+                "VALUES (%s, %s, %s, %s)",
+                rows
             )
+            await conn.commit()
+            _list_cache.clear()
+
+            return {"inserted": cursor.rowcount}
         except pymysql.IntegrityError as e:
+            await conn.rollback()
             raise HTTPException(
                 status_code=400,
                 detail=f"Integrity error: {str(e)}"
             )
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.get(
     "",
@@ -72,40 +159,74 @@ async def create_rental(
 async def get_rentals(
     skip: int = Query(0, ge=0),
     limit: int = Query(None, ge=1),
+    after_rental_date: Optional[datetime] = Query(None),
+    after_rental_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    # Un cursor de keyset a medias no es interpretable: rechazarlo en vez
+    # de ignorarlo y devolver en silencio la primera página otra vez.
+    if (after_rental_date is None) != (after_rental_id is None):
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                "after_rental_date and after_rental_id "
+                "must be provided together"
+            )
+        )
+
+    cache_key = (skip, limit, after_rental_date, after_rental_id)
+    cached = _list_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    async with get_db_connection() as conn:
+        # SSCursor no bufferiza el resultado completo en el driver: las
+        # filas se recogen por lotes y se convierten sobre la marcha.
+        cursor = await conn.cursor(aiomysql.SSCursor)
         try:
-            if limit is None:
-                cursor.execute(
-                    "SELECT * FROM rental ORDER BY rental_date DESC "
+            if after_rental_date is not None and after_rental_id is not None:
+                # Paginación por keyset: seguir desde la última fila vista
+                # es un range scan sobre el índice, mientras que OFFSET
+                # obliga a recorrer y descartar `skip` filas. El predicado
+                # va expandido porque el optimizador de MariaDB no
+                # convierte la comparación de tuplas (a, b) < (x, y) en
+                # un range seek.
+                await cursor.execute(
+                    f"SELECT {RENTAL_COLS} FROM rental "
+                    "WHERE rental_date < %s "
+                    "OR (rental_date = %s AND rental_id < %s) "
+                    "ORDER BY rental_date DESC, rental_id DESC LIMIT %s",
+                    (after_rental_date, after_rental_date,
+                     after_rental_id, limit or 100)
+                )
+            elif limit is None:
+                await cursor.execute(
+                    f"SELECT {RENTAL_COLS} FROM rental "
+                    "ORDER BY rental_date DESC "
                     "LIMIT 18446744073709551615 OFFSET %s",
                     (skip,)
                 )
             else:
-                cursor.execute(
-                    "SELECT * FROM rental ORDER BY rental_date DESC "
-                    "LIMIT %s OFFSET %s",
+                await cursor.execute(
+                    f"SELECT {RENTAL_COLS} FROM rental "
+                    "ORDER BY rental_date DESC LIMIT %s OFFSET %s",
                     (limit, skip)
                 )
-            rows = cursor.fetchall()
-
+            # Diccionarios planos + orjson: se evita construir un modelo
+            # Pydantic por fila en la ruta caliente del listado.
             rentals = []
-            for row in rows:
-                rentals.append(RentalResponse(
-                    rental_id=row[0],
-                    rental_date=row[1],
-                    inventory_id=row[2],
-                    customer_id=row[3],
-                    return_date=row[4],
-                    staff_id=row[5],
-                    last_update=row[6]
-                ))
-
-            return rentals
+            while True:
+                chunk = await cursor.fetchmany(500)
+                if not chunk:
+                    break
+                rentals.extend(_rental_to_dict(row) for row in chunk)
+            payload = orjson.dumps(rentals)
+            _list_cache.set(cache_key, payload)
+            return Response(
+                content=payload, media_type="application/json"
+            )
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.get(
     "/{rental_id}",
@@ -116,34 +237,40 @@ async def get_rentals(
 )
 async def get_rental(
     rental_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "SELECT * FROM rental WHERE rental_id = %s",
-                (rental_id,)
+    cached = _rental_cache.get(rental_id)
+    if cached is not None:
+        payload, etag = cached
+    else:
+        async with get_db_connection() as conn:
+            cursor = await conn.cursor()
+            try:
+                await cursor.execute(SELECT_RENTAL_SQL, (rental_id,))
+                row = await cursor.fetchone()
+            finally:
+                await cursor.close()
+
+        if not row:
+            raise HTTPException(
+                status_code=404,
+                detail="Rental not found"
             )
-            row = cursor.fetchone()
 
-            if not row:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Rental not found"
-                )
+        # El ETag deriva de last_update: si el cliente ya tiene esta
+        # versión, un 304 vacío le ahorra el cuerpo entero.
+        payload = orjson.dumps(_rental_to_dict(row))
+        etag = make_etag(rental_id, row[6])
+        _rental_cache.set(rental_id, (payload, etag))
 
-            return RentalResponse(
-                rental_id=row[0],
-                rental_date=row[1],
-                inventory_id=row[2],
-                customer_id=row[3],
-                return_date=row[4],
-                staff_id=row[5],
-                last_update=row[6]
-            )
-        finally:
-            cursor.close()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag},
+    )
 
 @router.put(
     "/{rental_id}/return",
@@ -156,52 +283,42 @@ async def return_rental(
     rental_id: int,
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
-            cursor.execute(
-                "SELECT rental_id, return_date FROM rental "
-                "WHERE rental_id = %s",
+            # La propia condición del UPDATE hace de comprobación de
+            # existencia y de "ya devuelta": solo si no afecta a ninguna
+            # fila hace falta un SELECT para distinguir el 404 del 400.
+            await cursor.execute(
+                "UPDATE rental SET return_date = NOW(), "
+                "last_update = NOW() "
+                "WHERE rental_id = %s AND return_date IS NULL",
                 (rental_id,)
             )
-            row = cursor.fetchone()
-
-            if not row:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Rental not found"
+            if cursor.rowcount == 0:
+                await cursor.execute(
+                    "SELECT return_date FROM rental "
+                    "WHERE rental_id = %s",
+                    (rental_id,)
                 )
-
-            if row[1] is not None:
+                if not await cursor.fetchone():
+                    raise HTTPException(
+                        status_code=404,
+                        detail="Rental not found"
+                    )
                 raise HTTPException(
                     status_code=400,
                     detail="Rental already returned"
                 )
+            _list_cache.clear()
+            _rental_cache.delete(rental_id)
 
-            cursor.execute(
-                "UPDATE rental SET return_date = NOW(), "
-                "last_update = NOW() WHERE rental_id = %s",
-                (rental_id,)
-            )
-            conn.commit()
+            await cursor.execute(SELECT_RENTAL_SQL, (rental_id,))
+            row = await cursor.fetchone()
 
-            cursor.execute(
-                "SELECT * FROM rental WHERE rental_id = %s",
-                (rental_id,)
-            )
-            row = cursor.fetchone()
-
-            return RentalResponse(
-                rental_id=row[0],
-                rental_date=row[1],
-                inventory_id=row[2],
-                customer_id=row[3],
-                return_date=row[4],
-                staff_id=row[5],
-                last_update=row[6]
-            )
+            return ORJSONResponse(_rental_to_dict(row))
         finally:
-            cursor.close()
+            await cursor.close()
 
 @router.get(
     "/customer/{customer_id}",
@@ -214,40 +331,91 @@ async def get_customer_rentals(
     customer_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    after_rental_date: Optional[datetime] = Query(None),
+    after_rental_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user)
 ):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "SELECT customer_id FROM customer WHERE customer_id = %s",
-                (customer_id,)
+    # Un cursor de keyset a medias no es interpretable: rechazarlo en vez
+    # de ignorarlo y devolver en silencio la primera página otra vez.
+    if (after_rental_date is None) != (after_rental_id is None):
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                "after_rental_date and after_rental_id "
+                "must be provided together"
             )
-            if not cursor.fetchone():
+        )
+
+    if after_rental_date is not None and after_rental_id is not None:
+        # Paginación por keyset sobre el índice compuesto
+        # (customer_id, rental_date): constante sea cual sea la página.
+        # El predicado va expandido porque el optimizador de MariaDB no
+        # convierte la comparación de tuplas (a, b) < (x, y) en un range
+        # seek.
+        query = (
+            f"SELECT {RENTAL_COLS} FROM rental "
+            "WHERE customer_id = %s "
+            "AND (rental_date < %s "
+            "OR (rental_date = %s AND rental_id < %s)) "
+            "ORDER BY rental_date DESC, rental_id DESC LIMIT %s"
+        )
+        params = (customer_id, after_rental_date, after_rental_date,
+                  after_rental_id, limit)
+    else:
+        query = (
+            f"SELECT {RENTAL_COLS} FROM rental "
+            "WHERE customer_id = %s "
+            "ORDER BY rental_date DESC LIMIT %s OFFSET %s"
+        )
+        params = (customer_id, limit, skip)
+
+    # La primera fila se lee antes de construir la respuesta: así el 404
+    # de cliente inexistente se decide con los cabeceros aún sin enviar,
+    # y la comprobación sobre customer solo corre en el caso frío de un
+    # resultado vacío.
+    stack = AsyncExitStack()
+    try:
+        conn = await stack.enter_async_context(get_db_connection())
+        # SSCursor no prefetcha el resultado completo: las filas llegan
+        # del servidor a medida que se emiten, así la memoria por
+        # petición es plana y el primer byte sale antes.
+        cursor = await conn.cursor(aiomysql.SSCursor)
+        stack.push_async_callback(cursor.close)
+        await cursor.execute(query, params)
+        first_row = await cursor.fetchone()
+
+        if first_row is None:
+            check = await conn.cursor()
+            try:
+                await check.execute(
+                    "SELECT customer_id FROM customer "
+                    "WHERE customer_id = %s",
+                    (customer_id,)
+                )
+                exists = await check.fetchone()
+            finally:
+                await check.close()
+            if not exists:
                 raise HTTPException(
                     status_code=404,
                     detail="Customer not found"
                 )
+            await stack.aclose()
+            return ORJSONResponse([])
+    except BaseException:
+        await stack.aclose()
+        raise
 
-            cursor.execute(
-                "SELECT * FROM rental WHERE customer_id = %s "
-                "ORDER BY rental_date DESC LIMIT %s OFFSET %s",
-                (customer_id, limit, skip)
-            )
-            rows = cursor.fetchall()
-
-            rentals = []
-            for row in rows:
-                rentals.append(RentalResponse(
-                    rental_id=row[0],
-                    rental_date=row[1],
-                    inventory_id=row[2],
-                    customer_id=row[3],
-                    return_date=row[4],
-                    staff_id=row[5],
-                    last_update=row[6]
-                ))
-
-            return rentals
+    async def stream():
+        try:
+            yield b"[" + orjson.dumps(_rental_to_dict(first_row))
+            while True:
+                row = await cursor.fetchone()
+                if row is None:
+                    break
+                yield b"," + orjson.dumps(_rental_to_dict(row))
+            yield b"]"
         finally:
-            cursor.close()
\ No newline at end of file
+            await stack.aclose()
+
+    return StreamingResponse(stream(), media_type="application/json")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class TTLCache:
+    """Caché en memoria con expiración por tiempo y tamaño máximo.
+
+    Pensada para respuestas ya serializadas de endpoints de solo lectura:
+    las entradas caducan a los `ttl` segundos y, si se supera `maxsize`,
+    se descarta la entrada más antigua.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def make_etag(*parts) -> str:
+    """ETag fuerte derivado de los componentes dados (id, last_update...):
+    cambia si y solo si cambia alguno de ellos."""
+    raw = "-".join(str(part) for part in parts).encode()
+    return f'"{hashlib.md5(raw).hexdigest()}"'
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-import pymysql
+from pymysql.constants import CLIENT
 
 load_dotenv()
 
@@ -9,9 +9,12 @@ DB_CONFIG = {
     "port": int(os.getenv("MARIADB_PORT")),
     "user": os.getenv("MARIADB_USER"),
     "password": os.getenv("MARIADB_PASSWORD"),
-    "database": os.getenv("MARIADB_DATABASE"),
+    "db": os.getenv("MARIADB_DATABASE"),
     "charset": "utf8mb4",
-    "cursorclass": pymysql.cursors.Cursor
+    # FOUND_ROWS hace que rowcount cuente las filas que casan con el WHERE
+    # aunque el UPDATE no cambie ningún valor; los endpoints lo usan para
+    # distinguir un 404 real de una actualización sin cambios.
+    "client_flag": CLIENT.FOUND_ROWS
 }
 
 SECRET_KEY = os.getenv("SECRET_KEY",)
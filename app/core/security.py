@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -78,19 +79,33 @@ async def get_current_user(
         raise credential_exception
     return User(username=token_data.username)
 
-async def authenticate_user(
-    username: str, password: str
-) -> bool:
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+# Hash de una contraseña de relleno: cuando el usuario no existe se
+# verifica contra él igualmente, de modo que el tiempo de respuesta no
+# delata qué usuarios están registrados.
+_DUMMY_HASH = pwd_context.hash("sakilaAPI-dummy-password")
+
+async def _get_stored_hash(username: str) -> Optional[str]:
+    async with get_db_connection() as conn:
+        cursor = await conn.cursor()
         try:
-            cursor.execute(
+            await cursor.execute(
                 "SELECT hashed_password FROM user WHERE username = %s",
                 (username,)
             )
-            row = cursor.fetchone()
-            if row and verify_password(password, row[0]):
-                return True
-            return False
+            row = await cursor.fetchone()
+            return row[0] if row else None
         finally:
-            cursor.close()
\ No newline at end of file
+            await cursor.close()
+
+async def authenticate_user(
+    username: str, password: str
+) -> bool:
+    # Una única verificación bcrypt por intento, en un hilo para no
+    # bloquear el event loop; si el usuario no existe se verifica contra
+    # el hash de relleno, así todos los caminos cuestan un bcrypt y el
+    # tiempo de respuesta no delata qué usuarios están registrados.
+    hashed = await _get_stored_hash(username)
+    valid = await asyncio.to_thread(
+        verify_password, password, hashed or _DUMMY_HASH
+    )
+    return hashed is not None and valid
\ No newline at end of file
@@ -1,20 +1,56 @@
-from contextlib import contextmanager
+import asyncio
+import os
+from contextlib import asynccontextmanager
+import aiomysql
 import pymysql
 from fastapi import HTTPException
 from app.core.config import DB_CONFIG
 
-pymysql.install_as_MySQLdb()
+POOL_MINSIZE = int(os.getenv("POOL_MINSIZE", "5"))
+POOL_SIZE = int(os.getenv("POOL_SIZE", "20"))
 
-@contextmanager
-def get_db_connection():
-    conn = None
+# Pool asíncrono compartido por todo el proceso. aiomysql habla el mismo
+# protocolo que PyMySQL pero sin bloquear el event loop durante la E/S,
+# así que las peticiones concurrentes se intercalan en vez de serializarse.
+_pool = None
+_pool_lock = asyncio.Lock()
+
+async def _get_pool() -> aiomysql.Pool:
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                # autocommit ahorra el round-trip del COMMIT en las
+                # escrituras de una sola sentencia; los endpoints por
+                # lotes abren su transacción explícita con conn.begin().
+                _pool = await aiomysql.create_pool(
+                    minsize=POOL_MINSIZE,
+                    maxsize=POOL_SIZE,
+                    pool_recycle=3600,
+                    autocommit=True,
+                    **DB_CONFIG
+                )
+    return _pool
+
+async def init_pool() -> None:
+    """Crea el pool al arrancar la aplicación para que la primera
+    petición no pague el coste de abrir las conexiones iniciales."""
+    await _get_pool()
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+@asynccontextmanager
+async def get_db_connection():
+    pool = await _get_pool()
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        yield conn
+        async with pool.acquire() as conn:
+            yield conn
     except pymysql.Error as e:
         raise HTTPException(
             status_code=500, detail=f"Error de base de datos: {str(e)}"
         )
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
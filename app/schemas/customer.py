@@ -1,17 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 class CustomerCreate(BaseModel):
-    store_id: int
-    first_name: str
-    last_name: str
-    email: Optional[str] = None
-    address_id: int
-    active: bool = True
-
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "store_id": 1,
                 "first_name": "John",
@@ -21,22 +13,32 @@ class CustomerCreate(BaseModel):
                 "active": True
             }
         }
+    )
+
+    store_id: int
+    first_name: str
+    last_name: str
+    email: str | None = None
+    address_id: int
+    active: bool = True
 
 class CustomerUpdate(BaseModel):
-    store_id: Optional[int] = None
-    first_name: Optional[str] = None
-    last_name: Optional[str] = None
-    email: Optional[str] = None
-    address_id: Optional[int] = None
-    active: Optional[bool] = None
+    store_id: int | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    email: str | None = None
+    address_id: int | None = None
+    active: bool | None = None
 
 class CustomerResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     customer_id: int
     store_id: int
     first_name: str
     last_name: str
-    email: Optional[str]
+    email: str | None
     address_id: int
     active: bool
     create_date: datetime
-    last_update: datetime
\ No newline at end of file
+    last_update: datetime
@@ -1,15 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
 
 class RentalCreate(BaseModel):
-    rental_date: datetime
-    inventory_id: int
-    customer_id: int
-    staff_id: int
-
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "rental_date": "2024-12-02T10:00:00",
                 "inventory_id": 1,
@@ -17,12 +11,20 @@ class RentalCreate(BaseModel):
                 "staff_id": 1
             }
         }
+    )
+
+    rental_date: datetime
+    inventory_id: int
+    customer_id: int
+    staff_id: int
 
 class RentalResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     rental_id: int
     rental_date: datetime
     inventory_id: int
     customer_id: int
-    return_date: Optional[datetime]
+    return_date: datetime | None
     staff_id: int
-    last_update: datetime
\ No newline at end of file
+    last_update: datetime
@@ -1,8 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, EmailStr, Field
 
 class UserCreate(BaseModel):
-    username: str = Field(..., min_length=3, max_length=50)
-    email: str = Field(..., min_length=5, max_length=100)
+    # El patrón se compila una sola vez al definir la clase; un username
+    # o e-mail mal formados se rechazan aquí, antes de tocar la base de
+    # datos.
+    username: str = Field(
+        ..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_]+$"
+    )
+    email: EmailStr = Field(..., max_length=100)
     password: str = Field(
         ...,
         min_length=8,
@@ -14,4 +19,4 @@ class UserResponse(BaseModel):
     user_id: int
     username: str
     email: str
-    disabled: bool
\ No newline at end of file
+    disabled: bool = False
@@ -1,18 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 import uvicorn
+import hashlib
+import orjson
 import os
 from dotenv import load_dotenv
 from app.api.v1 import router as v1_router
+from app.db.database import init_pool, close_pool
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_pool()
+    yield
+    await close_pool()
+
 app = FastAPI(
     title="sakilaAPI",
     description="API RESTful para manejar clientes y reservas en la base de datos de películas 'sakila'.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 app.include_router(v1_router)
 
+# La respuesta del endpoint raíz nunca cambia: se serializa una única vez
+# al arrancar y se sirve como bytes constantes con su ETag.
+_ROOT_BYTES = orjson.dumps({
+    "message": "sakilaAPI v1.0.0",
+    "endpoints": {
+        "customers": "/api/v1/customers",
+        "rentals": "/api/v1/rentals",
+        "auth": "/api/v1/auth",
+        "docs": "/docs"
+    }
+})
+_ROOT_ETAG = f'"{hashlib.md5(_ROOT_BYTES).hexdigest()}"'
+
 @app.get(
     "/",
     name="Endpoint inicial",
@@ -20,17 +46,34 @@ app.include_router(v1_router)
     description="Devuelve la información básica de la API, siendo esta información su nombre, su versión y los endpoints disponibles",
     tags=["General"]
 )
-async def root():
-    return {
-        "message": "sakilaAPI v1.0.0",
-        "endpoints": {
-            "customers": "/api/v1/customers",
-            "rentals": "/api/v1/rentals",
-            "auth": "/api/v1/auth",
-            "docs": "/docs"
-        }
-    }
+async def root(request: Request):
+    if request.headers.get("if-none-match") == _ROOT_ETAG:
+        return Response(status_code=304)
+    return Response(
+        content=_ROOT_BYTES,
+        media_type="application/json",
+        headers={
+            "ETag": _ROOT_ETAG,
+            "Cache-Control": "public, max-age=3600"
+        },
+    )
+
+# Generar el esquema OpenAPI ya con todas las rutas registradas: FastAPI
+# lo guarda en app.openapi_schema, así la primera visita a /docs no paga
+# el coste de construirlo.
+app.openapi()
 
 if __name__ == "__main__":
     port = int(os.getenv("FASTAPI_PORT"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # La app se pasa como string de import para poder levantar un worker
+    # por núcleo; cada worker corre uvloop + el parser HTTP de httptools.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count())),
+        loop="uvloop",
+        http="httptools",
+        backlog=2048,
+        timeout_keep_alive=75,
+    )
\ No newline at end of file
@@ -0,0 +1,15 @@
+-- Índices compuestos para los patrones de lectura de la API de reservas.
+--
+-- `GET /api/v1/rentals/customer/{id}` filtra por customer_id y ordena por
+-- rental_date DESC; sakila solo trae idx_fk_customer_id, así que sin este
+-- índice cada llamada hace un filesort. `GET /api/v1/rentals` ordena toda
+-- la tabla por rental_date DESC.
+--
+-- Ejecutar una vez sobre la base de datos sakila antes de desplegar:
+--   mysql sakila < migrations/001_rental_indexes.sql
+
+CREATE INDEX idx_rental_customer_date
+    ON rental (customer_id, rental_date DESC);
+
+CREATE INDEX idx_rental_date
+    ON rental (rental_date DESC);